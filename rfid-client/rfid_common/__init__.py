@@ -0,0 +1,28 @@
+"""
+Wspólny kod klientów RFID (edge node'ów).
+
+Trzy skrypty klienckie różniły się tylko parserem ramek konkretnego
+czytnika – EventStore, Sender, obsługa portu szeregowego i główna pętla
+były kopiowane 1:1. Tutaj jest jedna, zoptymalizowana implementacja
+(ring buffer, batch insert, WAL, sesja HTTP); klient per czytnik to
+wywołanie `run(<Parser>, CONFIG_PATH)`.
+"""
+
+from .main import load_config, run
+from .parsers import CF661Parser, ChafonRawParser, InnodParser
+from .reader import FrameParser, RingBuffer, SerialReader
+from .sender import Sender
+from .store import EventStore
+
+__all__ = [
+    "CF661Parser",
+    "ChafonRawParser",
+    "EventStore",
+    "FrameParser",
+    "InnodParser",
+    "RingBuffer",
+    "Sender",
+    "SerialReader",
+    "load_config",
+    "run",
+]
@@ -0,0 +1,123 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from .reader import SerialReader
+from .sender import Sender
+from .store import EventStore
+
+logger = logging.getLogger(__name__)
+
+# Antena potrafi raportować ten sam tag kilkadziesiąt razy na sekundę,
+# dopóki jest w polu – takie powtórki tniemy już na edge'u, zanim
+# cokolwiek trafi do SQLite i na sieć (serwer i tak ma okno 10 s).
+DEDUPE_WINDOW_SEC = 0.5
+_DEDUPE_MAX_ENTRIES = 256
+
+
+def load_config(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _sender_loop(store, sender, send_interval, batch_size, stop_evt):
+    """
+    Wysyłka w tle: pętla czytnika nigdy nie czeka na HTTP.
+
+    Wcześniej timeout POST-a (3 s) zamrażał odczyt tagów – bufor
+    szeregowy się przepełniał i traciliśmy EPC. Teraz czytnik tylko
+    dopisuje do SQLite, a ten wątek okresowo zbiera niewysłane eventy.
+
+    Rozważany był port na asyncio + aiohttp, ale osobny wątek z
+    requests.Session daje tę samą współbieżność serial/HTTP (oba I/O
+    zwalniają GIL), bez nowej zależności i przepisywania pętli czytnika.
+    Przy padzie sieci odstęp prób rośnie wykładniczo do 30 s, żeby nie
+    palić czasu na kolejne 3-sekundowe timeouty.
+    """
+    backoff = send_interval
+    while not stop_evt.is_set():
+        events = store.get_unsent(batch_size)
+        if events:
+            ok = sender.send_events(events)
+            if ok:
+                store.mark_sent(events[-1][0])
+                backoff = send_interval
+                if len(events) >= batch_size:
+                    # zaległości – wysyłaj od razu kolejną paczkę
+                    continue
+            else:
+                backoff = min(backoff * 2, 30)
+        else:
+            backoff = send_interval
+        stop_evt.wait(backoff)
+
+
+def run(parser_cls, config_path):
+    """Główna pętla klienta: serial → SQLite → HTTP batch do serwera."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+
+    cfg = load_config(config_path)
+    store = EventStore(cfg["db_path"], max_events=10000)
+    reader = SerialReader(cfg["serial_port"], cfg["baudrate"], parser_cls())
+    sender = Sender(cfg["server_url"], cfg["reader_id"])
+
+    send_interval = cfg.get("send_interval_sec", 2)
+    batch_size = cfg.get("send_batch_size", 200)
+
+    stop_evt = threading.Event()
+    sender_thread = threading.Thread(
+        target=_sender_loop,
+        args=(store, sender, send_interval, batch_size, stop_evt),
+        daemon=True,
+    )
+    sender_thread.start()
+
+    # Tagi zbieramy lokalnie i zapisujemy do SQLite batchami
+    # (jeden executemany + commit zamiast INSERT-u per odczyt).
+    pending_rows = []
+    last_flush = 0.0
+    flush_interval = 0.2
+    flush_max_rows = 50
+
+    reader.open()
+
+    # EPC -> ostatni odczyt (time.monotonic) do tłumienia powtórek
+    recent = {}
+
+    while True:
+        tags = reader.read_tags()
+        if tags:
+            now_mono = time.monotonic()
+            fresh = []
+            for tag in tags:
+                if now_mono - recent.get(tag, 0.0) < DEDUPE_WINDOW_SEC:
+                    continue
+                recent[tag] = now_mono
+                fresh.append(tag)
+
+            # okazjonalne czyszczenie, żeby słownik nie rósł bez końca
+            if len(recent) > _DEDUPE_MAX_ENTRIES:
+                cutoff = now_mono - DEDUPE_WINDOW_SEC
+                for k in [k for k, v in recent.items() if v < cutoff]:
+                    del recent[k]
+
+            if fresh:
+                # Wszystkie EPC z jednego odpytania dostają wspólny timestamp –
+                # jedna alokacja datetime + isoformat na burst, nie na tag.
+                ts_iso = datetime.now(timezone.utc).isoformat()
+                pending_rows.extend((ts_iso, tag) for tag in fresh)
+                logger.info("Read %d EPC(s)", len(fresh))
+
+        now = time.time()
+        if pending_rows and (
+            now - last_flush >= flush_interval
+            or len(pending_rows) >= flush_max_rows
+        ):
+            store.add_events(pending_rows)
+            pending_rows = []
+            last_flush = now
@@ -0,0 +1,238 @@
+"""
+Parsery ramek poszczególnych czytników.
+
+Uwaga wydajnościowa: pętle skanujące schodzą do C przy każdej operacji
+na bajtach – wyszukiwanie prefiksu to memchr-owe `bytes.find` w ring
+buforze, a kopiowanie ramki to jeden slice. Interpreter wykonuje tylko
+kilka instrukcji NA RAMKĘ (nie na bajt), więc port do Cythona/Numby nie
+ma tu czego przyspieszać, a na docelowych Pi nie ma kompilatora ani
+miejsca na toolchain numby. Gdyby kiedyś doszedł protokół wymagający
+skanu per-bajt w Pythonie (np. escape'owanie), to jest moduł do
+skompilowania w pierwszej kolejności.
+"""
+
+import logging
+
+from .reader import UPHEX, FrameParser, RingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class CF661Parser(FrameParser):
+    """
+    Parser ramek CF661 zgodnie z protokołem:
+    CF 00 00 01 12 00 XX YY 01 00 LL [LL bajtów EPC] [CRC_H] [CRC_L]
+
+    - Szukamy prefiksu CF 00 00 01 12 (5 bajtów),
+    - Czekamy aż w buforze będzie co najmniej 11 bajtów nagłówka,
+    - Bajt 10 = długość EPC (len),
+    - Pełna ramka ma: 11 (header) + len + 2 (CRC) bajtów,
+    - EPC = bajty 11 .. 10+len.
+    """
+
+    PREFIX = b"\xCF\x00\x00\x01\x12"
+    PREFIX_LEN = 5
+    MIN_HEADER_LEN = 11  # do bajtu length włącznie
+
+    def parse(self, buf: RingBuffer):
+        results = []
+        i = 0
+        # Gorące lookupy związane raz na wywołanie (LOAD_FAST zamiast
+        # LOAD_ATTR w pętli); bufor nie zmienia się podczas skanu.
+        prefix = self.PREFIX
+        prefix_len = self.PREFIX_LEN
+        min_header = self.MIN_HEADER_LEN
+        find = buf.find
+        peek = buf.peek
+        take = buf.slice
+        n = len(buf)
+
+        while True:
+            idx = find(prefix, i)
+            if idx == -1:
+                # brak prefiksu – zostaw tylko tyle, żeby ewentualny prefiks zmieścił się na końcu
+                i = max(i, n - (prefix_len - 1))
+                break
+
+            # Mamy początek prefiksu, ale jeszcze niekoniecznie cały nagłówek (11 bajtów)
+            if n - idx < min_header:
+                i = idx
+                break
+
+            # Bajt length (liczba bajtów EPC)
+            length = peek(idx + 10)
+            frame_len = min_header + length + 2  # header(11) + EPC + CRC(2)
+
+            if n - idx < frame_len:
+                # pełnej ramki jeszcze nie ma
+                i = idx
+                break
+
+            # Mamy pełną ramkę; kopiujemy tylko EPC (bajty 11 .. 10+length) –
+            # pełną ramkę materializujemy wyłącznie dla debug logu.
+            epc_bytes = take(idx + 11, length)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                frame = take(idx, frame_len)
+                logger.debug(
+                    "FRAME: %s EPC:%s",
+                    frame.hex().translate(UPHEX),
+                    epc_bytes.hex().translate(UPHEX),
+                )
+
+            results.append(epc_bytes)
+            i = idx + frame_len
+
+        if i > 0:
+            buf.advance(i)
+
+        return results
+
+
+class InnodParser(FrameParser):
+    """
+    Parser ramek INNOD RU5109 na podstawie realnych sniffów:
+
+    Przykładowa ramka:
+      43 54 00 1C 01 45 01 C3 83 25 08 01 3E 2A 01 0F 01 01
+      E2 80 11 91 A5 03 00 60 AC B8 76 76
+      82 3A
+
+    - Prefiks:                0x43 0x54
+    - Bajt długości (len):    na pozycji 3 (0-indeks) → tutaj 0x1C = 28
+    - Całkowita długość:      4 + len (prefiks + 2 bajty + len)
+    - EPC (12 bajtów):        offset 18, długość 12 bajtów
+                              → E2 80 11 91 A5 03 00 60 AC B8 76 76
+    - Na końcu:               2 bajty CRC
+
+    Ramki mogą występować „sklejone” jedna po drugiej w strumieniu.
+    """
+
+    PREFIX = b"\x43\x54"   # 'C', 'T'
+    PREFIX_LEN = len(PREFIX)
+    HEADER_LEN = 4         # 43 54 00 LEN
+    LEN_OFFSET = 3         # bajt długości
+    EPC_OFFSET = 18        # od początku ramki
+    EPC_LEN = 12           # bajty EPC
+    # Uwaga: offset jest od początku ramki, więc minimalna długość to EPC_OFFSET + EPC_LEN + CRC(2)
+    MIN_FRAME_LEN = EPC_OFFSET + EPC_LEN + 2
+
+    def parse(self, buf: RingBuffer):
+        results = []
+        i = 0
+        # Gorące lookupy związane raz na wywołanie (LOAD_FAST zamiast
+        # LOAD_ATTR w pętli); bufor nie zmienia się podczas skanu.
+        prefix = self.PREFIX
+        prefix_len = self.PREFIX_LEN
+        header_len = self.HEADER_LEN
+        len_offset = self.LEN_OFFSET
+        epc_offset = self.EPC_OFFSET
+        epc_len = self.EPC_LEN
+        min_frame_len = self.MIN_FRAME_LEN
+        find = buf.find
+        peek = buf.peek
+        take = buf.slice
+        n = len(buf)
+
+        while True:
+            idx = find(prefix, i)
+            if idx == -1:
+                # Brak prefiksu – zostaw końcówkę, która może być początkiem kolejnej ramki
+                i = max(i, n - (prefix_len - 1))
+                break
+
+            # Upewnij się, że mamy chociaż nagłówek (4 bajty: 43 54 00 LEN)
+            if n - idx < header_len:
+                i = idx
+                break
+
+            length = peek(idx + len_offset)
+            frame_len = header_len + length
+
+            # Jeżeli ramka jeszcze nie jest kompletna, czekamy na więcej danych
+            if n - idx < frame_len:
+                i = idx
+                break
+
+            # Mamy pełną ramkę
+            i = idx + frame_len
+
+            # Sanity check długości – realna ramka ma 32 bajty; krótsza
+            # ramka nie pomieściłaby EPC na offsecie 18
+            if frame_len < min_frame_len:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Frame too short (%d): %s",
+                        frame_len,
+                        take(idx, frame_len).hex().translate(UPHEX),
+                    )
+                continue
+
+            # Kopiujemy tylko EPC – pełną ramkę materializujemy
+            # wyłącznie dla debug logu.
+            epc_bytes = take(idx + epc_offset, epc_len)
+
+            # UHF EPC Gen2 często startuje od 0xE2, ale przepuszczamy też
+            # tagi kodowane dziesiętnie – filtr po stronie serwera.
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "FRAME: %s EPC:%s",
+                    take(idx, frame_len).hex().translate(UPHEX),
+                    epc_bytes.hex().translate(UPHEX),
+                )
+            results.append(epc_bytes)
+
+        if i > 0:
+            buf.advance(i)
+
+        return results
+
+
+class ChafonRawParser(FrameParser):
+    """
+    Ramka Chafon CF-RU5112 (z realnego sniffa):
+
+      11 00 EE 00  [12 bajtów EPC]  [2 bajty suma / ogon]
+
+    Możemy mieć kilka ramek sklejonych w buforze.
+    """
+
+    PREFIX = b"\x11\x00\xEE\x00"
+    FRAME_LEN = 4 + 12 + 2    # nagłówek + 12 bajtów EPC + 2 bajty ogona
+    EPC_OFFSET = 4
+    EPC_LEN = 12
+
+    def parse(self, buf: RingBuffer):
+        results = []
+        i = 0
+        # Gorące lookupy związane raz na wywołanie (LOAD_FAST zamiast
+        # LOAD_ATTR w pętli); bufor nie zmienia się podczas skanu.
+        prefix = self.PREFIX
+        frame_len = self.FRAME_LEN
+        epc_offset = self.EPC_OFFSET
+        epc_len = self.EPC_LEN
+        find = buf.find
+        take = buf.slice
+        append = results.append
+        n = len(buf)
+
+        while True:
+            idx = find(prefix, i)
+            if idx == -1:
+                # Zostaw końcówkę, która może być początkiem nagłówka
+                i = max(i, n - (len(prefix) - 1))
+                break
+
+            # Czy mamy całą ramkę?
+            if n - idx < frame_len:
+                i = idx
+                break
+
+            # Surowe bajty EPC – hex dopiero przy wysyłce HTTP
+            append(take(idx + epc_offset, epc_len))
+            i = idx + frame_len
+
+        if i > 0:
+            buf.advance(i)
+
+        return results
@@ -0,0 +1,145 @@
+import logging
+import time
+
+import serial
+
+logger = logging.getLogger(__name__)
+
+# .hex() zwraca lowercase; translate robi uppercase w jednym przebiegu C,
+# bez drugiej alokacji stringa przez .upper().
+UPHEX = str.maketrans("abcdef", "ABCDEF")
+
+
+class RingBuffer:
+    """
+    Stały bufor cykliczny na dane z portu szeregowego.
+
+    Zamiast `del buf[:k]` (memmove całego ogona przy każdej ramce)
+    mamy O(1) `advance(k)` po indeksach head/len na prealokowanej
+    bytearray. Ogranicza też pamięć, gdy serwer leży a parser nie nadąża.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self._buf = bytearray(capacity)
+        self._cap = capacity
+        self._head = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def write(self, data):
+        n = len(data)
+        cap = self._cap
+        if n >= cap:
+            # więcej niż cały bufor – zostaje tylko ogon danych
+            data = data[-cap:]
+            n = cap
+            self._head = 0
+            self._len = 0
+        overflow = self._len + n - cap
+        if overflow > 0:
+            # nadpisujemy najstarsze bajty
+            self.advance(overflow)
+        tail = (self._head + self._len) % cap
+        first = min(n, cap - tail)
+        self._buf[tail:tail + first] = data[:first]
+        if first < n:
+            self._buf[0:n - first] = data[first:]
+        self._len += n
+
+    def peek(self, off: int) -> int:
+        return self._buf[(self._head + off) % self._cap]
+
+    def slice(self, off: int, n: int) -> bytes:
+        start = (self._head + off) % self._cap
+        end = start + n
+        if end <= self._cap:
+            return bytes(self._buf[start:end])
+        return bytes(self._buf[start:]) + bytes(self._buf[:end - self._cap])
+
+    def find(self, prefix: bytes, start: int = 0) -> int:
+        if self._len == 0 or start >= self._len:
+            return -1
+        head = self._head
+        if head + self._len <= self._cap:
+            # dane leżą w jednym kawałku – szukamy bez kopiowania
+            idx = self._buf.find(prefix, head + start, head + self._len)
+            return -1 if idx < 0 else idx - head
+        # rzadki przypadek: dane zawinięte przez koniec bufora
+        return self.slice(0, self._len).find(prefix, start)
+
+    def advance(self, n: int):
+        n = min(n, self._len)
+        self._len -= n
+        # po opróżnieniu wracamy na początek, żeby find szedł bez kopii
+        self._head = 0 if self._len == 0 else (self._head + n) % self._cap
+
+
+class FrameParser:
+    """
+    Bazowy parser ramek czytnika.
+
+    Konkretny czytnik implementuje `parse(buf)`: jednoprzebiegowy skan
+    ring buffera, który konsumuje wszystkie kompletne ramki i zwraca
+    listę surowych bajtów EPC (hex robimy dopiero przy wysyłce HTTP).
+    Parser jest czystą funkcją nad buforem, więc można go testować
+    i benchmarkować bez sprzętu.
+    """
+
+    def parse(self, buf: RingBuffer):
+        raise NotImplementedError
+
+
+class SerialReader:
+    """Obsługa portu szeregowego z auto-reopen; parsowanie deleguje do parsera."""
+
+    def __init__(self, port: str, baudrate: int, parser: FrameParser,
+                 read_timeout: float = 0.1):
+        self.port = port
+        self.baudrate = baudrate
+        self.parser = parser
+        self.read_timeout = read_timeout
+        self.ser = None
+        self.buffer = RingBuffer(4096)
+
+    def open(self):
+        while True:
+            try:
+                logger.info("Opening serial port %s @ %d", self.port, self.baudrate)
+                self.ser = serial.Serial(
+                    port=self.port,
+                    baudrate=self.baudrate,
+                    bytesize=serial.EIGHTBITS,
+                    parity=serial.PARITY_NONE,
+                    stopbits=serial.STOPBITS_ONE,
+                    # Krótki blokujący read: czekanie odbywa się w kernelu
+                    # zamiast w pętli sleep() – niższa latencja i mniej
+                    # wybudzeń CPU na biegu jałowym.
+                    timeout=self.read_timeout,
+                )
+                logger.info("Serial port opened")
+                return
+            except serial.SerialException as e:
+                logger.error("Serial open failed: %s. Retrying in 5s", e)
+                time.sleep(5)
+
+    def _feed_buffer(self):
+        if self.ser is None:
+            self.open()
+        try:
+            data = self.ser.read(256)
+            if data:
+                self.buffer.write(data)
+        except serial.SerialException as e:
+            logger.error("Serial error on read: %s. Reopening...", e)
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+            self.ser = None
+
+    def read_tags(self):
+        """Dociąga dane z portu i zwraca listę EPC (bytes) z tego odpytania."""
+        self._feed_buffer()
+        return self.parser.parse(self.buffer)
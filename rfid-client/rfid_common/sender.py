@@ -0,0 +1,84 @@
+import json
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter, Retry
+
+from .reader import UPHEX
+
+logger = logging.getLogger(__name__)
+
+# orjson (enkoder w C) jest kilkukrotnie szybszy od stdlib json;
+# na węźle bez zainstalowanego orjson wysyłka działa dalej na stdlib.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Klucze eventu w payloadzie; dict(zip(...)) jest w CPythonie szybszy od
+# literału słownikowego budowanego per event.
+_KEYS = ("id", "ts", "tag")
+
+
+class Sender:
+    def __init__(self, server_url: str, reader_id: str):
+        self.server_url = server_url
+        self.reader_id = reader_id
+        # Jedna sesja HTTP z keep-alive: bez nowego TCP handshake na batch.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=2,
+            max_retries=Retry(total=3, backoff_factor=0.2),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def send_events(self, events):
+        if not events:
+            return False
+
+        payload = {
+            "reader_id": self.reader_id,
+            "events": [
+                # EPC leży w bazie jako BLOB – hex dopiero tutaj,
+                # na ścieżce i tak ograniczonej przez send_interval
+                dict(zip(_KEYS, (
+                    e_id,
+                    ts,
+                    tag.hex().translate(UPHEX) if isinstance(tag, bytes) else tag,
+                )))
+                for (e_id, ts, tag) in events
+            ],
+        }
+
+        if orjson is not None:
+            body = orjson.dumps(payload)
+        else:
+            body = json.dumps(payload).encode("utf-8")
+
+        try:
+            resp = self.session.post(
+                self.server_url,
+                data=body,
+                headers={"Content-Type": "application/json"},
+                timeout=3,
+            )
+            if 200 <= resp.status_code < 300:
+                logger.info(
+                    "Sent %d events, server status: %d",
+                    len(events),
+                    resp.status_code,
+                )
+                return True
+            else:
+                logger.error(
+                    "Server returned status %d: %s",
+                    resp.status_code,
+                    resp.text[:200],
+                )
+                return False
+        except requests.RequestException as e:
+            logger.error("HTTP error: %s", e)
+            return False
@@ -0,0 +1,109 @@
+import atexit
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class EventStore:
+    def __init__(self, db_path: str, max_events: int = 10000):
+        self.db_path = db_path
+        self.max_events = max_events
+        # Jedno trwałe połączenie na cały czas życia procesu;
+        # autocommit (isolation_level=None) + jawne BEGIN/COMMIT per batch.
+        # Z połączenia korzysta wątek czytnika i wątek sendera, więc
+        # check_same_thread=False + własny lock serializujący dostęp.
+        self._conn = sqlite3.connect(
+            self.db_path, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        atexit.register(self._conn.close)
+        self._init_db()
+
+    def _init_db(self):
+        with self._lock:
+            cur = self._conn.cursor()
+            # WAL + synchronous=NORMAL: bez podwójnego fsync na każdy commit,
+            # co na kartach SD (Pi) jest dominującym kosztem insertu.
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.execute("PRAGMA temp_store=MEMORY")
+            cur.execute("PRAGMA mmap_size=67108864")
+            cur.execute("PRAGMA cache_size=-8000")
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                  id   INTEGER PRIMARY KEY AUTOINCREMENT,
+                  ts   TEXT NOT NULL,
+                  tag  TEXT NOT NULL,
+                  sent INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_sent_id ON events(sent, id)"
+            )
+            # Licznik wierszy trzymamy w pamięci – COUNT(*) tylko raz na
+            # starcie, a nie przy każdym insercie.
+            cur.execute("SELECT COUNT(*) FROM events")
+            self._approx_count = cur.fetchone()[0]
+
+    # Ile wierszy ponad max_events tolerujemy zanim odpalimy trimming.
+    TRIM_SLACK = 500
+
+    def add_events(self, rows):
+        """Zapisuje batch wierszy (ts_iso, tag) w jednej transakcji."""
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO events(ts, tag, sent) VALUES (?, ?, 0)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+            self._approx_count += len(rows)
+            self._maybe_trim()
+
+    def _maybe_trim(self):
+        # wywoływane pod self._lock
+        if self._approx_count <= self.max_events + self.TRIM_SLACK:
+            return
+        to_delete = self._approx_count - self.max_events
+        logger.info("Trimming %d oldest events", to_delete)
+        cur = self._conn.cursor()
+        cur.execute(
+            "DELETE FROM events WHERE id IN ("
+            "  SELECT id FROM events ORDER BY id ASC LIMIT ?"
+            ")",
+            (to_delete,),
+        )
+        self._approx_count -= cur.rowcount or 0
+
+    def get_unsent(self, limit: int):
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute(
+                "SELECT id, ts, tag FROM events "
+                "WHERE sent = 0 ORDER BY id ASC LIMIT ?",
+                (limit,),
+            )
+            return cur.fetchall()
+
+    def mark_sent(self, max_id):
+        """
+        Oznacza jako wysłane wszystkie niewysłane eventy o id <= max_id.
+
+        get_unsent zwraca wiersze po id rosnąco, więc potwierdzony batch
+        to zawsze ciągły prefiks – jeden UPDATE z dwoma warunkami zamiast
+        dynamicznie sklejanej listy IN (?,...,?); predykat pokrywa
+        idx_events_sent_id.
+        """
+        if max_id is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE events SET sent = 1 WHERE sent = 0 AND id <= ?",
+                (max_id,),
+            )
@@ -1,14 +1,34 @@
 #!/usr/bin/env python3
 import json
 import logging
+import queue
 import sqlite3
+import threading
 import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import serial
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+
+# orjson (parser/enkoder w C) jest kilkukrotnie szybszy od stdlib json;
+# bez zainstalowanego orjson API działa dalej na jsonify/stdlib.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_response(obj: Any, status: int = 200) -> Any:
+    if orjson is not None:
+        return Response(
+            orjson.dumps(obj), status=status, mimetype="application/json"
+        )
+    resp = jsonify(obj)
+    resp.status_code = status
+    return resp
+
 
 # ---------------------------------------------------------------------
 # Konfiguracja podstawowa
@@ -71,12 +91,24 @@ dedup_cfg = CONFIG.get("dedup", {})
 DEDUP_WINDOW_SEC: int = int(dedup_cfg.get("window_sec", 10))
 IGNORE_LATE_SEC: int = int(dedup_cfg.get("ignore_late_sec", 300))
 
+# Timestampy eventów trzymamy jako INTEGER epoch-ms (8 bajtów, porównania
+# int-ami) – ISO formatujemy dopiero przy odczycie w API. Progi w ms:
+DEDUP_WINDOW_MS: int = DEDUP_WINDOW_SEC * 1000
+IGNORE_LATE_MS: int = IGNORE_LATE_SEC * 1000
+
 # Schedules
 READER_SCHEDULES: Dict[str, Any] = CONFIG.get("reader_schedules", {})
 
 # Known tags
 KNOWN_TAGS: Dict[str, Any] = load_known_tags(CONFIG.get("known_tags_file"))
 
+# Klucze znormalizowane raz na starcie (strip + upper, tak samo jak tagi
+# z eventów) – membership w gorącej pętli idzie po frozenset i nie
+# zależy od tego, jak ktoś zapisał EPC w known_tags.json.
+KNOWN_TAG_SET: frozenset = frozenset(
+    str(k).strip().upper() for k in KNOWN_TAGS
+)
+
 # ---------------------------------------------------------------------
 # Sterowanie przekaźnikiem RS-232 Eletechsup (4CH)
 # ---------------------------------------------------------------------
@@ -106,6 +138,33 @@ class RelayBoard:
         self.baudrate = baudrate
         self.timeout = timeout
         self.ser: Optional[serial.Serial] = None
+        # Komendy idą przez kolejkę do wątku drenującego – handler HTTP
+        # nie czeka na RS-232 (ponowne otwarcie portu po padzie potrafi
+        # trwać sekundy). Ograniczona kolejka, żeby zaległe odpalenia
+        # nie rosły bez końca, gdy port leży.
+        self._queue: "queue.Queue[int]" = queue.Queue(maxsize=256)
+        threading.Thread(
+            target=self._drain, name="relay", daemon=True
+        ).start()
+
+    def _drain(self) -> None:
+        while True:
+            channel = self._queue.get()
+            try:
+                self._fire_blocking(channel)
+            except Exception as e:
+                logging.error("Relay drain error: %s", e)
+
+    def fire_momentary(self, channel: int) -> bool:
+        """Zleca odpalenie kanału; zwraca od razu, bez czekania na port."""
+        try:
+            self._queue.put_nowait(channel)
+            return True
+        except queue.Full:
+            logging.error(
+                "Relay queue full – dropping fire on channel %s", channel
+            )
+            return False
 
     def _ensure_open(self) -> bool:
         if self.ser and self.ser.is_open:
@@ -129,7 +188,7 @@ class RelayBoard:
             self.ser = None
             return False
 
-    def fire_momentary(self, channel: int) -> bool:
+    def _fire_blocking(self, channel: int) -> bool:
         cmd = self.CMD_MOMENTARY.get(channel)
         if cmd is None:
             logging.error("Nieznany kanał przekaźnika: %s", channel)
@@ -141,10 +200,12 @@ class RelayBoard:
         try:
             self.ser.write(cmd)
             self.ser.flush()
-            # Opcjonalnie czytamy odpowiedź (nie blokujmy za długo)
-            time.sleep(0.05)
+            # Odpowiedzi płytki i tak nie interpretujemy – zamiast
+            # sleep(0.05) + read(8) (blokowało ingest ~50-250 ms na
+            # każde odpalenie) tylko czyścimy bufor wejściowy, żeby
+            # echo nie zalegało do następnego otwarcia portu.
             try:
-                _ = self.ser.read(8)
+                self.ser.reset_input_buffer()
             except Exception:
                 pass
             logging.info("Relay momentary fired on channel %d", channel)
@@ -183,43 +244,133 @@ else:
 # ---------------------------------------------------------------------
 
 
+# Jedno połączenie per wątek obsługi Flaska, trzymane przez cały czas
+# życia wątku – sqlite3.connect + PRAGMA-y na każdy request to był
+# czysty narzut (otwarcie pliku, parsowanie schematu, zimny page cache).
+_db_local = threading.local()
+
+
 def get_db_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+    conn = getattr(_db_local, "conn", None)
+    if conn is not None:
+        return conn
+    # Większy cache prepared statements: przy trwałym połączeniu każdy
+    # powtarzalny SQL (insert batcha, selecty API) kompiluje się raz.
+    conn = _db_local.conn = sqlite3.connect(DB_PATH, cached_statements=256)
+    cur = conn.cursor()
+    # WAL: zapisy nie blokują czytelników (live_all.py, /api/events),
+    # a synchronous=NORMAL tnie fsync-i per commit – w WAL nadal
+    # odporne na crash aplikacji, co dla logu eventów wystarcza.
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA cache_size=-20000")
+    cur.execute("PRAGMA mmap_size=268435456")
     return conn
 
 
+_EVENTS_DDL = """
+    CREATE TABLE IF NOT EXISTS events (
+      id           INTEGER PRIMARY KEY AUTOINCREMENT,
+      reader_id    TEXT NOT NULL,
+      tag          TEXT NOT NULL,
+      ts_client    INTEGER NOT NULL DEFAULT 0,
+      received_at  INTEGER NOT NULL,
+      source_ip    TEXT NOT NULL,
+      fired        INTEGER NOT NULL DEFAULT 0,
+      reason       TEXT NOT NULL,
+      edge_event_id INTEGER
+    )
+"""
+
+
 def init_db() -> None:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     conn = get_db_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS events (
-              id           INTEGER PRIMARY KEY AUTOINCREMENT,
-              reader_id    TEXT NOT NULL,
-              tag          TEXT NOT NULL,
-              ts_client    TEXT NOT NULL,
-              received_at  TEXT NOT NULL,
-              source_ip    TEXT NOT NULL,
-              fired        INTEGER NOT NULL DEFAULT 0,
-              reason       TEXT NOT NULL,
-              edge_event_id INTEGER
-            )
-            """
-        )
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_events_reader_tag_ts "
-            "ON events(reader_id, tag, ts_client)"
-        )
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_events_reader_tag_recv "
-            "ON events(reader_id, tag, received_at)"
+    cur = conn.cursor()
+
+    # Osierocona events_old = przerwana kiedyś migracja; nowa tabela
+    # events jest wtedy pusta, a historia siedzi w events_old. Nie wolno
+    # tego po cichu zignorować – serwer wystartowałby bez historii i z
+    # zimnym cache'em dedup.
+    cur.execute(
+        "SELECT name FROM sqlite_master "
+        "WHERE type = 'table' AND name = 'events_old'"
+    )
+    if cur.fetchone():
+        raise RuntimeError(
+            "Tabela events_old istnieje – przerwana migracja timestampów. "
+            "Przywróć dane ręcznie (np. DROP TABLE events; "
+            "ALTER TABLE events_old RENAME TO events) i uruchom ponownie."
         )
-        conn.commit()
-        logging.info("DB ready at %s", DB_PATH)
-    finally:
-        conn.close()
+
+    cur.execute(_EVENTS_DDL)
+
+    # Migracja starych baz: ts_client/received_at były ISO-tekstami.
+    # Przepisujemy tabelę z konwersją na epoch-ms (julianday radzi sobie
+    # z ISO od klientów; puste ts_client ląduje jako 0).
+    cur.execute(
+        "SELECT type FROM pragma_table_info('events') "
+        "WHERE name = 'received_at'"
+    )
+    row = cur.fetchone()
+    if row and str(row[0]).upper() == "TEXT":
+        logging.info("Migrating events timestamps to INTEGER epoch-ms...")
+        # Całość w jednej jawnej transakcji – sqlite3 auto-commituje DDL,
+        # więc bez BEGIN rename i CREATE zdążyłyby się utrwalić przed
+        # kopią danych i crash w trakcie zostawiłby pustą tabelę events.
+        # DDL w SQLite jest transakcyjne: po przerwaniu rename się cofa
+        # i migracja powtórzy się przy następnym starcie.
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute("ALTER TABLE events RENAME TO events_old")
+            cur.execute(_EVENTS_DDL)
+            cur.execute(
+                """
+                INSERT INTO events (
+                    id, reader_id, tag, ts_client, received_at,
+                    source_ip, fired, reason, edge_event_id
+                )
+                SELECT id, reader_id, tag,
+                       COALESCE(CAST((julianday(ts_client) - 2440587.5)
+                                     * 86400000 AS INTEGER), 0),
+                       COALESCE(CAST((julianday(received_at) - 2440587.5)
+                                     * 86400000 AS INTEGER), 0),
+                       source_ip, fired, reason, edge_event_id
+                FROM events_old
+                """
+            )
+            cur.execute("DROP TABLE events_old")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    # Jeden indeks zamiast dwóch: (reader_id, tag, id DESC) pokrywa
+    # zasiew cache'u dedup (GROUP BY reader_id, tag + ostatni wiersz) i
+    # ręczne zapytania "ostatni odczyt taga". Dotychczasowe indeksy po
+    # ts_client i received_at tylko dublowały koszt każdego INSERT-u.
+    cur.execute("DROP INDEX IF EXISTS idx_events_reader_tag_ts")
+    cur.execute("DROP INDEX IF EXISTS idx_events_reader_tag_recv")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_events_dedup "
+        "ON events(reader_id, tag, id DESC)"
+    )
+    # Checkpoint WAL-a co ~1000 stron, żeby plik -wal nie rósł bez
+    # końca przy ciągłym strumieniu eventów (ustawienie per-baza).
+    cur.execute("PRAGMA wal_autocheckpoint=1000")
+    # Statystyki dla planera – bez nich potrafi wybrać pełny skan
+    # zamiast świeżo założonego indeksu.
+    cur.execute("ANALYZE")
+    conn.commit()
+    logging.info("DB ready at %s", DB_PATH)
+    warm_dedup_cache(conn)
+
+
+# Retencja chodzi we własnym wątku – ingest nie płaci za DELETE.
+_RETENTION_INTERVAL_SEC = 60.0
+# Kasujemy porcjami, żeby pojedyncza transakcja nie trzymała write-locka
+# na czas czyszczenia zaległości (np. po podniesieniu max_events).
+_RETENTION_CHUNK = 10_000
 
 
 def enforce_retention(conn: sqlite3.Connection) -> None:
@@ -242,16 +393,43 @@ def enforce_retention(conn: sqlite3.Connection) -> None:
         # Mamy mniej niż MAX_EVENTS rekordów – nic nie robimy.
         return
 
-    cur.execute("DELETE FROM events WHERE id < ?", (min_id_to_keep,))
-    deleted = cur.rowcount or 0
-    if deleted > 0:
+    total = 0
+    while True:
+        cur.execute(
+            "DELETE FROM events WHERE id IN ("
+            "  SELECT id FROM events WHERE id < ? LIMIT ?"
+            ")",
+            (min_id_to_keep, _RETENTION_CHUNK),
+        )
+        deleted = cur.rowcount or 0
+        if deleted > 0:
+            conn.commit()
+            total += deleted
+        if deleted < _RETENTION_CHUNK:
+            break
+
+    if total > 0:
         logging.info(
             "Retention: deleted %d oldest events (id < %d) to keep ~%d rows",
-            deleted,
+            total,
             min_id_to_keep,
             MAX_EVENTS,
         )
-        conn.commit()
+
+
+def retention_loop() -> None:
+    while True:
+        try:
+            enforce_retention(get_db_conn())
+        except Exception as e:
+            logging.error("Retention error: %s", e)
+        time.sleep(_RETENTION_INTERVAL_SEC)
+
+
+def start_retention_thread() -> None:
+    threading.Thread(
+        target=retention_loop, name="retention", daemon=True
+    ).start()
 
 
 # ---------------------------------------------------------------------
@@ -270,47 +448,111 @@ def parse_ts_iso(ts: Optional[str]) -> Optional[datetime]:
         return None
 
 
-def is_late(ts_client: Optional[datetime], received_at: datetime) -> Tuple[bool, str]:
-    if IGNORE_LATE_SEC <= 0 or ts_client is None:
+def format_ts_ms(ms: Optional[int]) -> str:
+    """Epoch-ms -> ISO 8601 (UTC); tylko przy odczycie w API."""
+    if not ms:
+        return ""
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat()
+
+
+def is_late(ts_client_ms: Optional[int], received_at_ms: int) -> Tuple[bool, str]:
+    # Porównujemy epoch-ms int-ami zamiast datetime – zero alokacji
+    # w gorącej pętli.
+    if IGNORE_LATE_MS <= 0 or ts_client_ms is None:
         return False, ""
-    delta = (received_at - ts_client).total_seconds()
-    if delta > IGNORE_LATE_SEC:
+    if received_at_ms - ts_client_ms > IGNORE_LATE_MS:
         return True, "too_late"
     return False, ""
 
 
-def is_duplicate(
-    cur: sqlite3.Cursor,
-    reader_id: str,
-    tag: str,
-    received_at: datetime,
-) -> bool:
-    if DEDUP_WINDOW_SEC <= 0:
-        return False
+# Deduplikacja w pamięci: (reader_id, tag) -> epoch ostatniego odczytu.
+# SELECT per event wypada z gorącej ścieżki; przy starcie cache jest
+# zasiewany z bazy, więc restart serwera nie otwiera okna na duplikaty.
+_dedup_lock = threading.Lock()
+_dedup_last_seen: Dict[Tuple[str, str], int] = {}
+_dedup_next_sweep: int = 0
+_DEDUP_SWEEP_INTERVAL_MS = 60_000
 
+
+def warm_dedup_cache(conn: sqlite3.Connection) -> None:
+    """Zasiewa cache dedup ostatnim odczytem każdej pary (reader, tag)."""
+    if DEDUP_WINDOW_SEC <= 0:
+        return
+    cur = conn.cursor()
     cur.execute(
-        """
-        SELECT received_at
-        FROM events
-        WHERE reader_id = ? AND tag = ?
-        ORDER BY id DESC
-        LIMIT 1
-        """,
-        (reader_id, tag),
+        "SELECT reader_id, tag, MAX(received_at) FROM events "
+        "GROUP BY reader_id, tag"
     )
-    row = cur.fetchone()
-    if not row:
+    now_ms = int(time.time() * 1000)
+    loaded = 0
+    with _dedup_lock:
+        for reader_id, tag, received_at in cur.fetchall():
+            try:
+                ts_ms = int(received_at)
+            except (TypeError, ValueError):
+                continue
+            if now_ms - ts_ms <= DEDUP_WINDOW_MS:
+                _dedup_last_seen[(reader_id, tag)] = ts_ms
+                loaded += 1
+    logging.info("Dedup cache warmed with %d entries", loaded)
+
+
+def is_duplicate(reader_id: str, tag: str, now_ms: int) -> bool:
+    if DEDUP_WINDOW_MS <= 0:
         return False
 
-    try:
-        prev = datetime.fromisoformat(row[0])
-    except Exception:
+    global _dedup_next_sweep
+    key = (reader_id, tag)
+    with _dedup_lock:
+        prev = _dedup_last_seen.get(key)
+        # Ostatni odczyt aktualizujemy zawsze (tak jak wcześniej liczył
+        # się ostatni wiersz w bazie, niezależnie od reason).
+        _dedup_last_seen[key] = now_ms
+
+        if now_ms >= _dedup_next_sweep:
+            # Okresowy sweep, żeby słownik nie rósł ponad aktywne tagi.
+            cutoff = now_ms - DEDUP_WINDOW_MS
+            stale = [k for k, v in _dedup_last_seen.items() if v < cutoff]
+            for k in stale:
+                del _dedup_last_seen[k]
+            _dedup_next_sweep = now_ms + _DEDUP_SWEEP_INTERVAL_MS
+
+    if prev is None:
         return False
+    return abs(now_ms - prev) <= DEDUP_WINDOW_MS
 
-    delta = (received_at - prev).total_seconds()
-    if abs(delta) <= DEDUP_WINDOW_SEC:
-        return True
-    return False
+
+_ALWAYS_MASK = (1 << 24) - 1
+
+
+def _hour_mask(cfg: Dict[str, Any]) -> int:
+    """Zamienia wpis harmonogramu na 24-bitową maskę godzin (bit h = uzbrojony o h)."""
+    mode = str(cfg.get("mode", "always")).lower()
+    if mode == "never":
+        return 0
+    if mode == "window":
+        start = int(cfg.get("start_hour", 0)) % 24
+        end = int(cfg.get("end_hour", 0)) % 24
+        if start == end:
+            # bezpiecznie: traktuj jako 24/7
+            return _ALWAYS_MASK
+        mask = 0
+        h = start
+        # pętla po godzinach załatwia też okno "przez północ" (np. 21-6)
+        while h != end:
+            mask |= 1 << h
+            h = (h + 1) % 24
+        return mask
+    # "always" lub nieznany mode -> zawsze
+    return _ALWAYS_MASK
+
+
+# Maski policzone raz na starcie z configu; w runtime zostaje słownikowy
+# lookup i jeden shift zamiast parsowania wpisu przy każdym batchu.
+_SCHED: Dict[str, int] = {
+    reader_id: _hour_mask(cfg or {})
+    for reader_id, cfg in READER_SCHEDULES.items()
+}
 
 
 def is_reader_armed(reader_id: str, now_utc: datetime) -> bool:
@@ -321,47 +563,28 @@ def is_reader_armed(reader_id: str, now_utc: datetime) -> bool:
     - mode = "window"  -> przedział godzinowy [start_hour, end_hour)
                          w czasie lokalnym serwera; jeśli start > end,
                          to okno nocne (np. 21-6).
-    """
-    cfg = READER_SCHEDULES.get(reader_id)
-    if not cfg:
-        # brak wpisu -> domyślnie zawsze
-        return True
 
-    mode = str(cfg.get("mode", "always")).lower()
-    if mode == "always":
+    Wpisy są skompilowane do masek bitowych w _SCHED; brak wpisu lub
+    pełna maska oznacza 24/7 bez liczenia godziny lokalnej.
+    """
+    mask = _SCHED.get(reader_id, _ALWAYS_MASK)
+    if mask == _ALWAYS_MASK:
         return True
-    if mode == "never":
+    if mask == 0:
         return False
+    local_hour = now_utc.astimezone().hour  # strefa systemowa (timedatectl)
+    return bool((mask >> local_hour) & 1)
 
-    if mode == "window":
-        local = now_utc.astimezone()  # używa strefy systemowej (timedatectl)
-        hour = local.hour
-        start = int(cfg.get("start_hour", 0))
-        end = int(cfg.get("end_hour", 0))
-
-        if start == end:
-            # bezpiecznie: traktuj jako 24/7
-            return True
-
-        if start < end:
-            # zwykłe okno, np. 8-16
-            return start <= hour < end
-        else:
-            # okno "przez północ", np. 21-6
-            return hour >= start or hour < end
-
-    # nieznany mode -> domyślnie zawsze
-    return True
 
-
-def trigger_relay(reader_id: str) -> Tuple[bool, str]:
+def trigger_relay(channel: Optional[int]) -> Tuple[bool, str]:
     if not RELAY_ENABLED or RELAY_BOARD is None:
         return False, "relay_disabled"
 
-    channel = RELAY_MAPPING.get(reader_id)
     if not channel:
         return False, "no_channel_for_reader"
 
+    # "ok" oznacza zakolejkowanie komendy; fizyczny zapis na port robi
+    # wątek drenujący RelayBoard.
     ok = RELAY_BOARD.fire_momentary(channel)
     if ok:
         return True, "ok"
@@ -377,7 +600,7 @@ app = Flask(__name__)
 
 @app.route("/api/health", methods=["GET"])
 def health() -> Any:
-    return jsonify({"status": "ok"})
+    return json_response({"status": "ok"})
 
 
 @app.route("/api/events", methods=["GET"])
@@ -388,21 +611,18 @@ def list_events() -> Any:
         limit = 100
 
     conn = get_db_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, reader_id, tag, ts_client, received_at,
-                   source_ip, fired, reason, edge_event_id
-            FROM events
-            ORDER BY id DESC
-            LIMIT ?
-            """,
-            (limit,),
-        )
-        rows = cur.fetchall()
-    finally:
-        conn.close()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id, reader_id, tag, ts_client, received_at,
+               source_ip, fired, reason, edge_event_id
+        FROM events
+        ORDER BY id DESC
+        LIMIT ?
+        """,
+        (limit,),
+    )
+    rows = cur.fetchall()
 
     result: List[Dict[str, Any]] = []
     for r in rows:
@@ -411,8 +631,8 @@ def list_events() -> Any:
                 "id": r[0],
                 "reader_id": r[1],
                 "tag": r[2],
-                "ts_client": r[3],
-                "received_at": r[4],
+                "ts_client": format_ts_ms(r[3]),
+                "received_at": format_ts_ms(r[4]),
                 "source_ip": r[5],
                 "fired": bool(r[6]),
                 "reason": r[7],
@@ -420,104 +640,116 @@ def list_events() -> Any:
             }
         )
 
-    return jsonify(result)
+    return json_response(result)
 
 
 @app.route("/api/tags", methods=["POST"])
 def ingest_tags() -> Any:
-    received_at = datetime.now(timezone.utc)
-    received_at_iso = received_at.isoformat()
+    # Jedno odczytanie zegara na POST; harmonogram dostaje datetime,
+    # a dedup/is_late i kolumna received_at pracują na epoch-ms (int).
+    received_at_ts = time.time()
+    received_at = datetime.fromtimestamp(received_at_ts, timezone.utc)
+    received_at_ms = int(received_at_ts * 1000)
     source_ip = request.remote_addr or "unknown"
 
     try:
-        payload = request.get_json(force=True)
+        # Surowe body + orjson zamiast get_json – omijamy sniffowanie
+        # mimetype Werkzeuga i parsujemy w C.
+        if orjson is not None:
+            payload = orjson.loads(request.get_data())
+        else:
+            payload = request.get_json(force=True)
+        if not isinstance(payload, dict):
+            raise ValueError("payload is not an object")
     except Exception:
         logging.warning("Bad JSON in /api/tags from %s", source_ip)
-        return jsonify({"status": "error", "error": "invalid_json"}), 400
+        return json_response({"status": "error", "error": "invalid_json"}, 400)
 
     reader_id = payload.get("reader_id")
     events = payload.get("events")
 
     if not isinstance(reader_id, str) or not isinstance(events, list):
-        return (
-            jsonify(
-                {
-                    "status": "error",
-                    "error": "missing_reader_or_events",
-                }
-            ),
-            400,
+        return json_response(
+            {"status": "error", "error": "missing_reader_or_events"}, 400
         )
 
     conn = get_db_conn()
     results: List[Dict[str, Any]] = []
+    rows_to_insert: List[Tuple[Any, ...]] = []
     try:
         cur = conn.cursor()
 
-        for ev in events:
-            edge_event_id = ev.get("id")
-            ts_client_str = ev.get("ts")
-            tag_raw = ev.get("tag")
-
-            if tag_raw is None:
-                continue
+        # Niezmienniki batcha policzone raz: cały POST ma jeden reader_id
+        # i jeden received_at, więc harmonogram i kanał przekaźnika nie
+        # mają prawa zmienić się między eventami.
+        reader_armed = is_reader_armed(reader_id, received_at)
+        relay_channel = RELAY_MAPPING.get(reader_id)
+
+        # Normalizacja oddzielona od reguł biznesowych: jedna list
+        # comprehension (pętla w C) buduje krotki, a pętla z regułami
+        # dostaje już gotowe dane bez .get()/str() per pole.
+        normalized = [
+            (
+                ev.get("id"),
+                ev.get("ts"),
+                str(tag_raw).strip().upper(),
+            )
+            for ev in events
+            if (tag_raw := ev.get("tag")) is not None
+        ]
 
-            tag = str(tag_raw).strip().upper()
+        for edge_event_id, ts_client_str, tag in normalized:
             ts_client_dt = parse_ts_iso(ts_client_str)
+            ts_client_ms = (
+                int(ts_client_dt.timestamp() * 1000)
+                if ts_client_dt is not None
+                else None
+            )
 
             reason = ""
             fired_flag = 0
 
             # 1) filtr po znanych tagach
-            if tag not in KNOWN_TAGS:
+            if tag not in KNOWN_TAG_SET:
                 reason = "unknown_tag"
             else:
                 # 2) okno czasowe readera
-                if not is_reader_armed(reader_id, received_at):
+                if not reader_armed:
                     reason = "outside_schedule"
                 else:
                     # 3) spóźnione eventy
-                    late, late_reason = is_late(ts_client_dt, received_at)
+                    late, late_reason = is_late(ts_client_ms, received_at_ms)
                     if late:
                         reason = late_reason
                     else:
-                        # 4) deduplikacja
-                        if is_duplicate(cur, reader_id, tag, received_at):
+                        # 4) deduplikacja (w pamięci – łapie też
+                        # powtórki wewnątrz batcha)
+                        if is_duplicate(reader_id, tag, received_at_ms):
                             reason = "duplicate"
                         else:
                             # 5) przekaźnik
-                            ok, relay_reason = trigger_relay(reader_id)
+                            ok, relay_reason = trigger_relay(relay_channel)
                             if ok:
                                 fired_flag = 1
                                 reason = "ok"
                             else:
                                 reason = relay_reason
 
-            cur.execute(
-                """
-                INSERT INTO events (
-                    reader_id, tag, ts_client,
-                    received_at, source_ip,
-                    fired, reason, edge_event_id
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
+            rows_to_insert.append(
                 (
                     reader_id,
                     tag,
-                    ts_client_str or "",
-                    received_at_iso,
+                    ts_client_ms or 0,
+                    received_at_ms,
                     source_ip,
                     fired_flag,
                     reason,
                     edge_event_id,
-                ),
+                )
             )
-            db_id = cur.lastrowid
-
             results.append(
                 {
-                    "db_id": db_id,
+                    "db_id": None,
                     "edge_event_id": edge_event_id,
                     "tag": tag,
                     "fired": bool(fired_flag),
@@ -525,13 +757,40 @@ def ingest_tags() -> Any:
                 }
             )
 
-        conn.commit()
-        # Po każdym batchu egzekwujemy retencję.
-        enforce_retention(conn)
-    finally:
-        conn.close()
+        if rows_to_insert:
+            # Jeden executemany w jednej transakcji zamiast INSERT-u per
+            # event: N round-tripów Python<->SQLite spada do 1.
+            conn.execute("BEGIN IMMEDIATE")
+            cur.executemany(
+                """
+                INSERT INTO events (
+                    reader_id, tag, ts_client,
+                    received_at, source_ip,
+                    fired, reason, edge_event_id
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows_to_insert,
+            )
+            # AUTOINCREMENT w obrębie jednego statementu nadaje ciągłe id,
+            # więc odtwarzamy db_id arytmetycznie z last_insert_rowid().
+            cur.execute("SELECT last_insert_rowid()")
+            last_id = int(cur.fetchone()[0])
+            conn.commit()
 
-    return jsonify({"status": "ok", "count": len(results), "results": results})
+            first_id = last_id - len(rows_to_insert) + 1
+            for offset, res in enumerate(results):
+                res["db_id"] = first_id + offset
+
+    except Exception:
+        # Połączenie jest cache'owane per wątek – nie zamykamy go, ale
+        # nie możemy zostawić otwartej transakcji po błędzie.
+        conn.rollback()
+        raise
+
+    return json_response(
+        {"status": "ok", "count": len(results), "results": results}
+    )
 
 
 # ---------------------------------------------------------------------
@@ -541,6 +800,7 @@ def ingest_tags() -> Any:
 if __name__ == "__main__":
     logging.info("Starting RFID central API server...")
     init_db()
+    start_retention_thread()
 
     listen_host = CONFIG.get("listen_host", "0.0.0.0")
     listen_port = int(CONFIG.get("listen_port", 5000))
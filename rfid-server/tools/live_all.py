@@ -1,11 +1,30 @@
 #!/usr/bin/env python3
+import os
 import sqlite3
+import sys
 import time
 
 DB_PATH = "/opt/rfid-server/events.db"
+WAL_PATH = DB_PATH + "-wal"
 POLL_INTERVAL_SEC = 0.5  # co ile odświeżamy (sekundy)
 
 
+def db_signature():
+    """
+    Sygnatura plików bazy (mtime + rozmiar, także WAL-a) – zmienia się
+    przy każdym zapisie serwera. Dopóki się nie zmieni, nie odpytujemy
+    SQLite w ogóle; na biegu jałowym zostają dwa staty na pół sekundy.
+    """
+    sig = []
+    for path in (DB_PATH, WAL_PATH):
+        try:
+            st = os.stat(path)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            sig.append(None)
+    return tuple(sig)
+
+
 def main():
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
@@ -19,23 +38,37 @@ def main():
     print(" id    czas      reader_id             tag                       reason")
     print("------ --------  -------------------   ------------------------  ----------------")
 
+    last_sig = None
+
     try:
         while True:
-            cur.execute(
-                """
-                SELECT id, reader_id, tag, reason, received_at
-                FROM events
-                WHERE id > ?
-                ORDER BY id ASC
-                """,
-                (last_id,),
-            )
-            rows = cur.fetchall()
-
-            for ev_id, reader_id, tag, reason, ts in rows:
-                last_id = ev_id
-                t = ts[11:19] if ts else ""
-                print(f"{ev_id:6d} {t}  {reader_id:19s}  {tag:24s}  {reason}")
+            sig = db_signature()
+            if sig != last_sig:
+                last_sig = sig
+                cur.execute(
+                    """
+                    SELECT id, reader_id, tag, reason, received_at
+                    FROM events
+                    WHERE id > ?
+                    ORDER BY id ASC
+                    """,
+                    (last_id,),
+                )
+                rows = cur.fetchall()
+
+                if rows:
+                    last_id = rows[-1][0]
+                    # Jeden syscall na batch: writelines konsumuje
+                    # generator wierszy, flush dopiero po całości.
+                    # received_at to epoch-ms (INTEGER); pokazujemy
+                    # godzinę UTC, tak jak wcześniej wycinek ISO.
+                    sys.stdout.writelines(
+                        f"{ev_id:6d} "
+                        f"{time.strftime('%H:%M:%S', time.gmtime(ts / 1000)) if ts else '':8s}  "
+                        f"{reader_id:19s}  {tag:24s}  {reason}\n"
+                        for ev_id, reader_id, tag, reason, ts in rows
+                    )
+                    sys.stdout.flush()
 
             time.sleep(POLL_INTERVAL_SEC)
     except KeyboardInterrupt:
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Punkt wejścia WSGI dla gunicorna:
+
+    gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+
+Dev-serwer Flaska obsługuje jeden request naraz – przy kilku edge'ach
+POST-y ustawiały się w kolejce za sobą (i za I/O przekaźnika). Workery
+gthread dają współbieżność bez zmiany kodu: SQLite i serial zwalniają
+GIL. Zostajemy przy 1 procesie, bo cache dedup i RelayBoard żyją w
+pamięci procesu.
+
+Flask >= 2.3 nie ma już before_first_request, więc inicjalizację
+robimy na imporcie modułu, idempotentnie i pod lockiem – gunicorn może
+importować moduł więcej niż raz (preload, restart workera).
+"""
+
+import threading
+
+from rfid_server import app, init_db, start_retention_thread
+
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _init_once() -> None:
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        init_db()
+        start_retention_thread()
+        _initialized = True
+
+
+_init_once()